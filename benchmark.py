@@ -0,0 +1,285 @@
+# ===================================================================================
+#                  BENCHMARK PROSES PROMO MASSAL (DATA SINTETIS)
+# ===================================================================================
+# Membuat input sintetis yang meniru file asli (list promo, DB master, export Shopee multi-file,
+# export TikTok dengan sheet 'Template' & header bergeser, 3 template upload) lalu menjalankan
+# promo_engine lewat CLI di proses terpisah dan membaca PROFIL_PROSES.json per ukuran data.
+#
+#   python benchmark.py --sizes 1k 100k 1M --output hasil_benchmark.json
+#   python benchmark.py --sizes 100k --baseline hasil_benchmark.json   # exit code 1 jika ada regresi
+#   python benchmark.py --clean-sku 1M                                 # micro-benchmark clean_sku_series saja
+
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from promo_engine import EXCEL_WRITERS, DEFAULT_EXCEL_WRITER, DEFAULT_MAX_WORKERS, PROFILE_FILENAME, clean_sku_series
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "promo_massal_benchmark")
+DEFAULT_SIZES = ['1k', '100k', '1M']
+DATASET_VERSION = 1  # naikkan jika bentuk data sintetis berubah agar dataset lama dibuat ulang
+SHOPEE_HEADER = ['et_title_product_id', 'et_title_product_name', 'et_title_variation_id', 'et_title_variation_name', 'et_title_parent_sku', 'et_title_variation_sku', 'et_title_variation_price', 'et_title_variation_stock']
+TIKTOK_HEADER = ['product_id', 'product_name', 'sku_id', 'variation_value', 'seller_sku', 'price', 'quantity']
+TEMPLATES = {
+    'tmpl_shopee.xlsx': ['ID Produk', 'ID Variasi', 'Harga Diskon', 'Stok Campaign', 'Batas Pembelian'],
+    'tmpl_tiktok1.xlsx': ['Product_id (wajib)', 'SKU_id (wajib)', 'Harga Penawaran (wajib)', 'Total Stok Promosi (opsional)', 'Batas Pembelian (opsional)'],
+    'tmpl_tiktok2.xlsx': ['Product_id (wajib)', 'Harga Penawaran (wajib)', 'Batas Pembelian (opsional)'],
+}
+
+def parse_size(text):
+    text = str(text).strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+def dirty_skus(skus, rng):
+    # Variasi penulisan SKU yang ditemui di file asli; semuanya harus kembali ke SKU yang sama setelah clean_sku_series
+    skus = skus.astype(object)
+    kind = rng.random(len(skus))
+    lower, spaced, decimal, letter_o = kind < 0.08, (kind >= 0.08) & (kind < 0.16), (kind >= 0.16) & (kind < 0.23), (kind >= 0.23) & (kind < 0.30)
+    skus[lower] = [s.lower() for s in skus[lower]]
+    skus[spaced] = [f"  {s} " for s in skus[spaced]]
+    skus[decimal] = [f"{s}.0" for s in skus[decimal]]
+    skus[letter_o] = [s.replace('0', 'O', 1) for s in skus[letter_o]]
+    return skus
+
+def junk_prices(prices, rng, junk_rate):
+    # Harga campuran angka & teks: format rupiah (tetap terbaca), teks sampah & sel kosong (terbaca 0)
+    prices = prices.astype(object)
+    kind = rng.random(len(prices))
+    rupiah, junk = kind < 0.05, (kind >= 0.05) & (kind < 0.05 + junk_rate)
+    prices[rupiah] = [f"Rp {p:,}".replace(',', '.') for p in prices[rupiah]]
+    prices[junk] = rng.choice(['', '-', 'junk', 'N/A'], int(junk.sum()))
+    return prices
+
+def write_xlsx(path, sheets):
+    EXCEL_WRITERS[DEFAULT_EXCEL_WRITER](path, sheets)
+
+def generate_dataset(n_skus, out_dir, seed=42, shopee_files=2, tiktok_files=2):
+    """ Buat satu set file input sintetis untuk n_skus SKU di out_dir; kembalikan dict path per kunci input """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    skus = np.array([f"BRG{i:07d}" for i in range(n_skus)], dtype=object)
+    categories = np.array(['ELEKTRONIK', 'FASHION', 'RUMAH TANGGA', 'KECANTIKAN', ''], dtype=object)
+    base_price = rng.integers(20, 4000, n_skus) * 500
+
+    # List promo: ~1% SKU duplikat (baris kedua harganya berbeda), ~1% diskon negatif & harga promo di bawah batas minimum
+    promo_idx = np.concatenate([np.arange(n_skus), rng.choice(n_skus, max(1, n_skus // 100))])
+    harga_jual = base_price[promo_idx]
+    harga_diskon = (harga_jual * rng.uniform(0.5, 0.95, len(promo_idx))).round(-2).astype(np.int64)
+    odd = rng.random(len(promo_idx))
+    harga_diskon[odd < 0.01] = harga_jual[odd < 0.01] + 1000
+    harga_diskon[(odd >= 0.01) & (odd < 0.02)] = 500
+    promo_df = pd.DataFrame({'No': np.arange(1, len(promo_idx) + 1), 'Kode Barang': dirty_skus(skus[promo_idx], rng), 'Nama Barang': [f"Produk {i}" for i in promo_idx],
+                             'Harga Jual': junk_prices(harga_jual, rng, 0.01), 'Harga Diskon': junk_prices(harga_diskon, rng, 0.01), 'Kategori': rng.choice(categories, len(promo_idx))})
+    write_xlsx(os.path.join(out_dir, 'promo.xlsx'), [('Sheet1', promo_df)])
+    del promo_df
+
+    # DB master: ~92% SKU promo (harga online 0-10% di atas harga offline) + 5% SKU yang tidak ada di promo, sedikit duplikat
+    in_master = np.flatnonzero(rng.random(n_skus) < 0.92)
+    master_skus = np.concatenate([skus[in_master], [f"BRX{i:07d}" for i in range(n_skus // 20)]])
+    master_prices = np.concatenate([(base_price[in_master] * rng.uniform(1.0, 1.1, len(in_master))).round(-2).astype(np.int64), rng.integers(20, 4000, n_skus // 20) * 500])
+    duplicates = rng.choice(len(master_skus), max(1, len(master_skus) // 200))
+    master_skus, master_prices = np.concatenate([master_skus, master_skus[duplicates]]), np.concatenate([master_prices, master_prices[duplicates]])
+    master_df = pd.DataFrame({'KodeBarang': dirty_skus(master_skus, rng), 'NamaBarang': 'Produk', 'HargaJual': junk_prices(master_prices, rng, 0.005)})
+    write_xlsx(os.path.join(out_dir, 'master.xlsx'), [('Sheet1', master_df)])
+    del master_df
+
+    # Export Shopee: ~85% SKU, varian dikelompokkan per produk, ~0.5% SKU terdaftar di dua listing; dibagi ke beberapa file
+    listed = np.concatenate([np.flatnonzero(rng.random(n_skus) < 0.85), rng.choice(n_skus, max(1, n_skus // 200))])
+    shopee_df = pd.DataFrame({'et_title_product_id': 10_000_000 + np.arange(len(listed)) // 3, 'et_title_product_name': 'Produk', 'et_title_variation_id': 50_000_000 + np.arange(len(listed)),
+                              'et_title_variation_name': 'Varian', 'et_title_parent_sku': '', 'et_title_variation_sku': dirty_skus(skus[listed], rng),
+                              'et_title_variation_price': rng.integers(20, 4000, len(listed)) * 500, 'et_title_variation_stock': rng.integers(0, 500, len(listed))})[SHOPEE_HEADER]
+    shopee_paths = []
+    for k, part in enumerate(np.array_split(np.arange(len(shopee_df)), shopee_files)):
+        shopee_paths.append(os.path.join(out_dir, f'shopee_{k + 1}.xlsx'))
+        write_xlsx(shopee_paths[-1], [('Sheet1', shopee_df.iloc[part])])
+    del shopee_df
+
+    # Export TikTok: ~80% SKU, sheet 'Template' setelah sheet petunjuk, header di baris ke-3 diikuti baris keterangan
+    listed = np.flatnonzero(rng.random(n_skus) < 0.80)
+    tiktok_df = pd.DataFrame({'product_id': 1_700_000_000_000 + np.arange(len(listed)) // 2, 'product_name': 'Produk', 'sku_id': 1_730_000_000_000 + np.arange(len(listed)),
+                              'variation_value': 'Varian', 'seller_sku': dirty_skus(skus[listed], rng), 'price': rng.integers(20, 4000, len(listed)) * 500, 'quantity': rng.integers(0, 500, len(listed))})
+    preamble = [['Petunjuk: jangan ubah 3 baris pertama'] + [''] * (len(TIKTOK_HEADER) - 1), TIKTOK_HEADER, ['Wajib', 'Opsional', 'Wajib', 'Opsional', 'Wajib', 'Wajib', 'Wajib']]
+    tiktok_paths = []
+    for k, part in enumerate(np.array_split(np.arange(len(tiktok_df)), tiktok_files)):
+        rows = tiktok_df.iloc[part]
+        sheet = pd.concat([pd.DataFrame(preamble[1:], columns=TIKTOK_HEADER), rows], ignore_index=True).astype(object)
+        sheet.columns = preamble[0]
+        tiktok_paths.append(os.path.join(out_dir, f'tiktok_{k + 1}.xlsx'))
+        write_xlsx(tiktok_paths[-1], [('Petunjuk', pd.DataFrame({'Petunjuk': ['Isi data di sheet Template']})), ('Template', sheet)])
+    del tiktok_df
+
+    for filename, columns in TEMPLATES.items():
+        write_xlsx(os.path.join(out_dir, filename), [('Sheet1', pd.DataFrame(columns=columns))])
+    return {
+        "promo_internal": os.path.join(out_dir, 'promo.xlsx'), "db_master": os.path.join(out_dir, 'master.xlsx'), "db_shopee": shopee_paths, "db_tiktok": tiktok_paths,
+        "template_shopee": os.path.join(out_dir, 'tmpl_shopee.xlsx'), "template_tiktok1": os.path.join(out_dir, 'tmpl_tiktok1.xlsx'), "template_tiktok2": os.path.join(out_dir, 'tmpl_tiktok2.xlsx'),
+    }
+
+def ensure_dataset(n_skus, data_dir, seed, log=print):
+    # Dataset dipakai ulang selama ukuran, seed & versi generator sama (membuat data 1M SKU butuh beberapa menit)
+    out_dir = os.path.join(data_dir, f"{n_skus}_seed{seed}")
+    manifest_path = os.path.join(out_dir, 'dataset.json')
+    params = {'version': DATASET_VERSION, 'n_skus': n_skus, 'seed': seed}
+    try:
+        with open(manifest_path, encoding='utf-8') as f: manifest = json.load(f)
+        if manifest['params'] == params and all(os.path.exists(p) for value in manifest['inputs'].values() for p in (value if isinstance(value, list) else [value])):
+            return manifest['inputs']
+    except (OSError, ValueError, KeyError):
+        pass
+    log(f"-> Membuat dataset sintetis {n_skus} SKU di '{out_dir}'...")
+    start = time.perf_counter()
+    inputs = generate_dataset(n_skus, out_dir, seed, shopee_files=3 if n_skus >= 500_000 else 2)
+    with open(manifest_path, 'w', encoding='utf-8') as f: json.dump({'params': params, 'inputs': inputs}, f, indent=2)
+    log(f"   Selesai dalam {time.perf_counter() - start:.1f} detik.")
+    return inputs
+
+def run_engine(inputs, output_dir, workers, extra_args=()):
+    """ Jalankan promo_engine di proses baru (agar puncak RSS tiap run tidak tercampur) lalu kembalikan isi PROFIL_PROSES.json """
+    os.makedirs(output_dir, exist_ok=True)
+    command = [sys.executable, '-m', 'promo_engine', '--promo', inputs['promo_internal'], '--db-master', inputs['db_master'], '--db-shopee', *inputs['db_shopee'], '--db-tiktok', *inputs['db_tiktok'],
+               '--template-shopee', inputs['template_shopee'], '--template-tiktok1', inputs['template_tiktok1'], '--template-tiktok2', inputs['template_tiktok2'],
+               '--output-dir', output_dir, '--workers', str(workers), '--no-cache', *extra_args]
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, 'engine.log'), 'w', encoding='utf-8') as log_file:
+        returncode = subprocess.call(command, stdout=log_file, stderr=subprocess.STDOUT, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - start
+    if returncode == 2: raise RuntimeError(f"promo_engine gagal (exit code 2), lihat '{os.path.join(output_dir, 'engine.log')}'")
+    with open(os.path.join(output_dir, PROFILE_FILENAME), encoding='utf-8') as f: profile = json.load(f)
+    return profile, wall, returncode
+
+def summarize_profile(profile, wall):
+    """ Ringkas catatan profil: detik per tahap (dijumlah lintas file/platform/proses), baris terbesar & puncak memori """
+    records = pd.DataFrame(profile['tahap'])
+    stages = records[records['tahap'] != 'TOTAL'].groupby('tahap', sort=False).agg(detik=('detik', 'sum'), baris=('baris_keluar', 'max'))
+    main_rss = records.loc[records['pid'] == profile['pid_utama'], 'puncak_rss_mb'].max()
+    worker_rss = records.loc[records['pid'] != profile['pid_utama'], 'puncak_rss_mb'].max()
+    return {
+        'wall_detik': round(wall, 3),
+        'engine_detik': float(records.loc[records['tahap'] == 'TOTAL', 'detik'].max()),
+        'puncak_rss_utama_mb': None if pd.isna(main_rss) else float(main_rss),
+        'puncak_rss_worker_mb': None if pd.isna(worker_rss) else float(worker_rss),
+        'tahap': {name: {'detik': round(float(row['detik']), 3), 'baris': None if pd.isna(row['baris']) else int(row['baris'])} for name, row in stages.iterrows()},
+    }
+
+def best_run(runs):
+    # Dari beberapa pengulangan, ambil run dengan waktu engine tercepat (paling sedikit gangguan dari proses lain)
+    return min(runs, key=lambda run: run['engine_detik'])
+
+def compare_results(current, baseline, tolerance, min_seconds=0.05, min_mb=20.0):
+    """ Bandingkan dengan hasil benchmark sebelumnya; kembalikan daftar pesan regresi """
+    regressions = []
+    for size, result in current['results'].items():
+        base = baseline.get('results', {}).get(size)
+        if not base: continue
+        checks = [('engine_detik', result['engine_detik'], base['engine_detik'], min_seconds, 'detik')]
+        checks += [(key, result[key], base.get(key), min_mb, 'MB') for key in ('puncak_rss_utama_mb', 'puncak_rss_worker_mb')]
+        checks += [(f"tahap '{name}'", stage['detik'], base['tahap'].get(name, {}).get('detik'), min_seconds, 'detik') for name, stage in result['tahap'].items()]
+        for label, value, base_value, min_delta, unit in checks:
+            if value is None or base_value is None: continue
+            if value > base_value * (1 + tolerance) and value - base_value > min_delta:
+                regressions.append(f"[{size} SKU] {label}: {base_value} -> {value} {unit} (+{(value / base_value - 1) * 100 if base_value else float('inf'):.0f}%)")
+    return regressions
+
+def format_results(results):
+    rows = []
+    for size, result in results.items():
+        rows.append({'SKU': size, 'tahap': 'TOTAL (engine)', 'detik': result['engine_detik'], 'baris': None})
+        rows += [{'SKU': size, 'tahap': name, 'detik': stage['detik'], 'baris': stage['baris']} for name, stage in result['tahap'].items()]
+        rows.append({'SKU': size, 'tahap': 'puncak RSS utama / worker (MB)', 'detik': None, 'baris': None, 'memori': f"{result['puncak_rss_utama_mb']} / {result['puncak_rss_worker_mb']}"})
+    return pd.DataFrame(rows, columns=['SKU', 'tahap', 'detik', 'baris', 'memori']).astype({'baris': 'Int64'}).astype(object).fillna('').to_string(index=False)
+
+def clean_value(value):
+    # Normalisasi SKU lama (dipanggil per baris lewat Series.apply); pembanding untuk clean_sku_series
+    if pd.isna(value): return ""
+    return str(value).strip().upper().replace("O", "0").split('.')[0]
+
+def clean_sku_str_chain(series):
+    return series.where(series.notna(), "").astype(str).str.strip().str.upper().str.replace("O", "0", regex=False).str.split('.', n=1).str[0]
+
+CLEAN_SKU_VARIANTS = {
+    'Series.apply(clean_value)': lambda series: series.apply(clean_value),
+    'list comprehension (clean_sku_series)': clean_sku_series,
+    'rantai .str': clean_sku_str_chain,
+}
+
+def benchmark_clean_sku(n_skus, seed=42, repeat=3):
+    """ Waktu terbaik (detik) tiap cara normalisasi SKU pada n_skus SKU kotor; semua hasil harus identik """
+    rng = np.random.default_rng(seed)
+    skus = pd.Series(dirty_skus(np.array([f"SK{i:07d}" for i in rng.permutation(n_skus)], dtype=object), rng))
+    skus[rng.random(n_skus) < 0.01] = np.nan
+    timings, expected = {}, None
+    for name, clean in CLEAN_SKU_VARIANTS.items():
+        best = float('inf')
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            cleaned = clean(skus)
+            best = min(best, time.perf_counter() - start)
+        if expected is None: expected = cleaned
+        elif not cleaned.equals(expected): raise AssertionError(f"Hasil '{name}' berbeda dengan Series.apply(clean_value)")
+        timings[name] = round(best, 3)
+    return timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmark.py", description="Benchmark promo_engine dengan data marketplace sintetis.")
+    parser.add_argument("--sizes", nargs='+', default=DEFAULT_SIZES, help=f"Jumlah SKU per dataset, boleh pakai akhiran k/M (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Folder dataset sintetis & hasil run (dataset dipakai ulang antar benchmark)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed generator data (default: 42)")
+    parser.add_argument("--repeat", type=int, default=1, help="Jumlah pengulangan per ukuran; yang dilaporkan run tercepat (default: 1)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Jumlah proses paralel engine (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--output", metavar="PATH", help="Simpan hasil benchmark dalam format JSON ke PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="Bandingkan dengan hasil JSON sebelumnya; exit code 1 jika ada regresi")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Batas kenaikan waktu/memori sebelum dianggap regresi, 0-1 (default: 0.20)")
+    parser.add_argument("--clean-sku", metavar="N", help="Hanya jalankan micro-benchmark normalisasi SKU untuk N SKU (boleh k/M), tanpa menjalankan engine")
+    parser.add_argument("engine_args", nargs=argparse.REMAINDER, help="Argumen tambahan untuk promo_engine setelah '--', mis. -- --excel-writer openpyxl")
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline): parser.error(f"file baseline '{args.baseline}' tidak ditemukan")
+    engine_args = args.engine_args[1:] if args.engine_args[:1] == ['--'] else args.engine_args
+
+    if args.clean_sku:
+        n_skus = parse_size(args.clean_sku)
+        print(f"-> Normalisasi {n_skus} SKU kotor (terbaik dari {max(1, args.repeat)} run, hasil semua cara diperiksa identik):", flush=True)
+        for name, seconds in benchmark_clean_sku(n_skus, args.seed, args.repeat).items(): print(f"   {name:<40} {seconds:.3f} detik")
+        return 0
+
+    results = {}
+    for size_text in args.sizes:
+        n_skus = parse_size(size_text)
+        inputs = ensure_dataset(n_skus, args.data_dir, args.seed)
+        runs = []
+        for attempt in range(max(1, args.repeat)):
+            print(f"-> Menjalankan engine untuk {n_skus} SKU (run {attempt + 1}/{max(1, args.repeat)})...", flush=True)
+            profile, wall, returncode = run_engine(inputs, os.path.join(args.data_dir, f"{n_skus}_seed{args.seed}", 'output'), args.workers, engine_args)
+            runs.append(summarize_profile(profile, wall))
+            print(f"   Selesai dalam {wall:.1f} detik{' (dengan error, lihat engine.log)' if returncode else ''}.", flush=True)
+        results[str(n_skus)] = best_run(runs)
+
+    report = {
+        'dibuat': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'lingkungan': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__, 'os': platform.platform(), 'cpu': os.cpu_count(), 'workers': args.workers, 'engine_args': engine_args},
+        'seed': args.seed,
+        'results': results,
+    }
+    print("\n" + format_results(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n-> Hasil benchmark disimpan ke '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f: baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regresi dibanding '{args.baseline}' (toleransi {args.tolerance:.0%}):")
+            for message in regressions: print(f"   - {message}")
+            return 1
+        print(f"\n✅ Tidak ada regresi dibanding '{args.baseline}' (toleransi {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
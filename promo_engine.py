@@ -0,0 +1,1064 @@
+# ===================================================================================
+#                  MESIN PROSES PROMO MASSAL MARKETPLACE (TANPA GUI)
+# ===================================================================================
+# Dipakai oleh GUI (massal_promo.py) dan bisa dijalankan langsung:
+#   python -m promo_engine --promo promo.xlsx --db-master master.xlsx ... --json-summary ringkasan.json
+
+import pandas as pd
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+from pandas._libs.parsers import STR_NA_VALUES
+import warnings
+import os
+import sys
+import json
+import argparse
+import hashlib
+import time
+import threading
+import functools
+import itertools
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".promo_massal_cache")
+DEFAULT_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # Jumlah proses paralel untuk membaca/menulis file Excel
+DEFAULT_CHUNK_ROWS = 50_000  # Jumlah baris DB marketplace per potongan pada mode streaming
+SUMMARY_FILENAME = 'RINGKASAN_PROSES_KESELURUHAN.xlsx'
+PROFILE_FILENAME = 'PROFIL_PROSES.json'
+
+# Kunci input yang dibutuhkan engine; db_shopee & db_tiktok berisi daftar file, sisanya satu path
+INPUT_KEYS = ["promo_internal", "db_master", "db_shopee", "db_tiktok", "template_shopee", "template_tiktok1", "template_tiktok2"]
+
+def clean_sku_series(series):
+    # Normalisasi SKU per kolom: NaN -> "", lalu strip, upper, O->0, buang bagian setelah titik pertama.
+    # Satu list comprehension lebih cepat daripada Series.apply maupun rantai .str pada dtype object.
+    values = series.where(series.notna(), "").astype(str).tolist()
+    return pd.Series([v.strip().upper().replace("O", "0").partition('.')[0] for v in values], index=series.index, dtype=object)
+
+def find_col_name(df, possible_names, file_type_for_error):
+    df_cols_map = {str(c).replace('\xa0', ' ').strip().lower(): str(c) for c in df.columns}
+    for name in possible_names:
+        clean_name = name.lower().strip()
+        if clean_name in df_cols_map: return df_cols_map[clean_name]
+    raise ValueError(f"Di file '{file_type_for_error}', tidak bisa menemukan kolom '{possible_names[0]}'. Kolom yang ada: {list(df.columns)}")
+
+def clean_price_series(series):
+    # Harga dalam rupiah selalu bulat: int64 (8 byte/baris) menggantikan string asli, tidak lagi float.
+    # Angka >= 1e18 (mis. barcode yang tertempel di kolom harga) tidak muat di int64, jadi dianggap tidak terbaca (0)
+    numeric = pd.to_numeric(series.astype(str).str.replace(r'\D', '', regex=True), errors='coerce')
+    return numeric.where(numeric < 1e18, 0).astype(np.int64)  # NaN (teks tanpa angka) juga gagal perbandingan -> 0
+
+def read_columns(read, path, wanted, file_type_for_error, optional=()):
+    """ Baca hanya kolom yang dicari. wanted = {kunci: [nama kandidat]}; kembalikan (DataFrame, {kunci: nama kolom atau None}).
+        Header lengkap tetap dicatat agar pesan error find_col_name sama seperti saat semua kolom dibaca """
+    candidates = {name.lower().strip() for names in wanted.values() for name in names}
+    header = []
+    def keep(column):
+        header.append(column)
+        return str(column).replace('\xa0', ' ').strip().lower() in candidates
+    df = read(path, usecols=keep)
+    header_df = pd.DataFrame(columns=header)
+    columns = {}
+    for key, names in wanted.items():
+        try: columns[key] = find_col_name(header_df, names, file_type_for_error)
+        except ValueError:
+            if key not in optional: raise
+            columns[key] = None
+    return df, columns
+
+def peak_rss_mb():
+    """ Puncak memori (RSS) proses saat ini dalam MB; None jika tidak bisa dibaca di OS ini """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD), ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t), ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t), ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS(cb=ctypes.sizeof(PROCESS_MEMORY_COUNTERS))
+            get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            if not get_info(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb): return None
+            return round(counters.PeakWorkingSetSize / 1024 ** 2, 1)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB di Linux, byte di macOS
+        return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+    except Exception:
+        return None
+
+class RunProfiler:
+    """ Catat waktu, jumlah baris & memori tiap tahap proses. Aman dipakai dari beberapa thread sekaligus;
+        catatan dari proses worker dikirim balik sebagai list dict lalu digabung lewat extend() """
+    COLUMNS = ['tahap', 'detail', 'detik', 'baris_masuk', 'baris_keluar', 'memori_df_mb', 'puncak_rss_mb', 'pid']
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, detail='', seconds=0.0, rows_in=None, rows_out=None, df=None):
+        entry = {'tahap': stage, 'detail': detail, 'detik': round(seconds, 3), 'baris_masuk': rows_in, 'baris_keluar': rows_out,
+                 'memori_df_mb': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1) if df is not None else None,
+                 'puncak_rss_mb': peak_rss_mb(), 'pid': os.getpid()}
+        with self._lock: self.records.append(entry)
+
+    def extend(self, records):
+        with self._lock: self.records.extend(records)
+
+    @contextmanager
+    def stage(self, stage, detail='', rows_in=None):
+        # Isi info['rows_out'] / info['df'] (opsional info['detail']) di dalam blok; memori DataFrame dihitung setelah blok selesai
+        info = {}
+        start = time.perf_counter()
+        yield info
+        self.record(stage, info.get('detail', detail), time.perf_counter() - start, rows_in, info.get('rows_out'), info.get('df'))
+
+    def to_frame(self):
+        return pd.DataFrame(self.records, columns=self.COLUMNS).astype({'baris_masuk': 'Int64', 'baris_keluar': 'Int64'})
+
+def profile_stage(profiler, stage, detail='', rows_in=None):
+    # Loader & writer juga bisa dipanggil tanpa profiler (mis. dari cache atau skrip lain)
+    return profiler.stage(stage, detail, rows_in) if profiler is not None else nullcontext({})
+
+def iter_excel_rows(path, sheet_name=None):
+    """ Baris worksheet satu per satu (openpyxl read-only), sheet_name tidak ada = sheet pertama.
+        Konversi sel disamakan dengan reader openpyxl milik pandas; sel kosong di ujung kanan dibuang """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.worksheets[0]
+        ws.reset_dimensions()
+        for row in ws.iter_rows(values_only=True):
+            converted_row = ["" if v is None else np.nan if isinstance(v, str) and v in ERROR_CODES else int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+            while converted_row and converted_row[-1] == "": converted_row.pop()
+            yield converted_row
+    finally:
+        wb.close()
+
+def is_tiktok_header(row):
+    return any(keyword in ' '.join(str(v) for v in row).lower() for keyword in ('product_id', 'seller_sku'))
+
+def read_tiktok_db(path, usecols=None):
+    # Satu kali buka & satu kali baca: sheet 'Template' (atau sheet pertama), baris header dicari dari 10 baris pertama
+    data, h_idx, last_row_with_data = [], None, -1
+    for row_number, converted_row in enumerate(iter_excel_rows(path, "Template")):
+        if converted_row: last_row_with_data = row_number
+        data.append(converted_row)
+        if h_idx is None and row_number < 10 and is_tiktok_header(converted_row): h_idx = row_number
+    data = data[:last_row_with_data + 1]
+    if not data: return pd.DataFrame()
+    max_width = max(len(r) for r in data)
+    data = [r + [""] * (max_width - len(r)) for r in data]
+    return TextParser(data, header=h_idx or 0, dtype=str, skip_blank_lines=False, usecols=usecols).read().fillna('')
+
+# Kolom yang dibaca dari tiap file; kolom lain tidak pernah dimuat ke memori
+PROMO_COLUMNS = {'sku_asli': ['Kode Barang'], 'harga_jual_offline': ['Harga Jual'], 'harga_promo_offline': ['Harga Diskon', 'HARGA PROMO'], 'kategori': ['Kategori', 'Category']}
+MASTER_COLUMNS = {'sku': ['KodeBarang'], 'harga_jual_online': ['HargaJual']}
+SHOPEE_SKU_COLUMNS = ['et_title_variation_sku', 'SKU']
+TIKTOK_SKU_COLUMNS = ['seller_sku']
+SHOPEE_DB_COLUMNS = {'id_produk': ['et_title_product_id', 'ID Produk'], 'id_varian': ['et_title_variation_id', 'ID Variasi'], 'nama_produk': ['et_title_product_name']}
+TIKTOK_DB_COLUMNS = {'id_produk': ['product_id'], 'id_varian': ['sku_id'], 'nama_produk': ['product_name']}
+
+def load_promo_data(path, profiler=None):
+    name = os.path.basename(path)
+    with profile_stage(profiler, 'baca excel', name) as stage:
+        # Kolom kategori opsional, dipakai untuk batas audit per kategori (lihat AUDIT_CONFIG_FILE)
+        promo_df_raw, cols = read_columns(functools.partial(pd.read_excel, dtype=str), path, PROMO_COLUMNS, "Promo", optional=['kategori'])
+        stage.update(rows_out=len(promo_df_raw), df=promo_df_raw)
+    with profile_stage(profiler, 'bersihkan harga', name, len(promo_df_raw)) as stage:
+        promo_data = pd.DataFrame({'sku_asli': promo_df_raw[cols['sku_asli']], 'harga_jual_offline': clean_price_series(promo_df_raw[cols['harga_jual_offline']]), 'harga_promo_offline': clean_price_series(promo_df_raw[cols['harga_promo_offline']])})
+        stage['rows_out'] = len(promo_data)
+    with profile_stage(profiler, 'bersihkan SKU', name, len(promo_data)) as stage:
+        promo_data['sku'] = clean_sku_series(promo_data['sku_asli'])
+        stage['rows_out'] = len(promo_data)
+    promo_data['kategori'] = promo_df_raw[cols['kategori']].fillna('').str.strip().str.upper() if cols['kategori'] else ''
+    promo_data['kategori'] = promo_data['kategori'].astype('category')  # hanya sedikit nilai berbeda
+    return promo_data
+
+def load_master_data(path, profiler=None):
+    name = os.path.basename(path)
+    with profile_stage(profiler, 'baca excel', name) as stage:
+        master_df, cols = read_columns(functools.partial(pd.read_excel, dtype=str), path, MASTER_COLUMNS, "DB Master")
+        stage.update(rows_out=len(master_df), df=master_df)
+    with profile_stage(profiler, 'bersihkan SKU', name, len(master_df)) as stage:
+        master_data = pd.DataFrame({'sku': clean_sku_series(master_df[cols['sku']])})
+        stage['rows_out'] = len(master_data)
+    with profile_stage(profiler, 'bersihkan harga', name, len(master_df)) as stage:
+        master_data['harga_jual_online'] = clean_price_series(master_df[cols['harga_jual_online']])
+        stage['rows_out'] = len(master_data)
+    return master_data
+
+def load_marketplace_db(read, path, sku_names, db_columns, file_type, profiler=None):
+    # Hanya kolom SKU + kolom listing yang dibaca. SKU mentah dibuang setelah dibersihkan; ID produk & nama produk
+    # berulang untuk tiap varian sehingga disimpan sebagai category
+    with profile_stage(profiler, 'baca excel', os.path.basename(path)) as stage:
+        db_df, cols = read_columns(read, path, {'sku': sku_names, **db_columns}, file_type)
+        stage.update(rows_out=len(db_df), df=db_df)
+    with profile_stage(profiler, 'bersihkan SKU', os.path.basename(path), len(db_df)) as stage:
+        db_df['lookup_sku_cleaned'] = clean_sku_series(db_df.pop(cols['sku']))
+        db_df = db_df.astype({cols['id_produk']: 'category', cols['nama_produk']: 'category'})
+        stage.update(rows_out=len(db_df), df=db_df)
+    return db_df
+
+def load_shopee_db(path, profiler=None):
+    read = lambda path, usecols: pd.read_excel(path, dtype=str, usecols=usecols).fillna('')
+    return load_marketplace_db(read, path, SHOPEE_SKU_COLUMNS, SHOPEE_DB_COLUMNS, f"DB Shopee ({os.path.basename(path)})", profiler)
+
+def load_tiktok_db(path, profiler=None):
+    return load_marketplace_db(read_tiktok_db, path, TIKTOK_SKU_COLUMNS, TIKTOK_DB_COLUMNS, f"DB TikTok ({os.path.basename(path)})", profiler)
+
+def _cell_text(value):
+    # Sama dengan read_excel(dtype=str).fillna(''): sel kosong, error & teks NA bawaan pandas ('N/A', 'NULL', ...) -> ''
+    if isinstance(value, str): return '' if value in STR_NA_VALUES else value
+    return '' if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+
+def scan_marketplace_db(path, sheet_name, find_header, sku_names, db_columns, file_type, promo_skus, chunk_rows=DEFAULT_CHUNK_ROWS, profiler=None):
+    """ Mode streaming: baca DB per potongan chunk_rows baris dan simpan hanya listing yang SKU-nya ada di promo_skus.
+        Kembalikan (DataFrame lookup_sku_cleaned + kolom db_columns, jumlah baris yang dipindai) """
+    name = os.path.basename(path)
+    with profile_stage(profiler, 'pindai DB (streaming)', name) as stage:
+        rows = iter_excel_rows(path, sheet_name)
+        head = list(itertools.islice(rows, 10))
+        h_idx = next((i for i, row in enumerate(head) if find_header(row)), 0) if find_header else 0
+        header = [str(v) for v in head[h_idx]] if head else []
+        wanted = {'lookup_sku_cleaned': sku_names, **db_columns}
+        header_df = pd.DataFrame(columns=header)
+        indices = [header.index(find_col_name(header_df, names, file_type)) for names in wanted.values()]
+        matched, buffer, scanned = [], [], 0
+        def flush():
+            chunk = pd.DataFrame(buffer, columns=list(wanted))
+            chunk['lookup_sku_cleaned'] = clean_sku_series(chunk['lookup_sku_cleaned'])
+            matched.append(chunk[chunk['lookup_sku_cleaned'].isin(promo_skus)])
+            buffer.clear()
+        for row in itertools.chain(head[h_idx + 1:], rows):
+            buffer.append([_cell_text(row[i]) if i < len(row) else '' for i in indices])
+            scanned += 1
+            if len(buffer) >= chunk_rows: flush()
+        if buffer or not matched: flush()
+        matched_df = pd.concat(matched, ignore_index=True)
+        stage.update(rows_out=len(matched_df), df=matched_df, detail=f"{name} ({scanned} baris)")
+    return matched_df, scanned
+
+def scan_shopee_db(path, promo_skus, chunk_rows=DEFAULT_CHUNK_ROWS, profiler=None):
+    return scan_marketplace_db(path, None, None, SHOPEE_SKU_COLUMNS, SHOPEE_DB_COLUMNS, f"DB Shopee ({os.path.basename(path)})", promo_skus, chunk_rows, profiler)
+
+def scan_tiktok_db(path, promo_skus, chunk_rows=DEFAULT_CHUNK_ROWS, profiler=None):
+    return scan_marketplace_db(path, "Template", is_tiktok_header, TIKTOK_SKU_COLUMNS, TIKTOK_DB_COLUMNS, f"DB TikTok ({os.path.basename(path)})", promo_skus, chunk_rows, profiler)
+
+def load_template(path, profiler=None):
+    with profile_stage(profiler, 'baca excel', os.path.basename(path)) as stage:
+        template_df = pd.read_excel(path)
+        stage.update(rows_out=len(template_df), df=template_df)
+    return template_df
+
+def _table_rows(df):
+    # Baris sebagai nilai Python biasa; NaN/NA -> None agar ditulis sebagai sel kosong (sama dengan na_rep='' milik pandas)
+    columns = [series.astype(object).where(series.notna(), None).tolist() for _, series in df.items()]
+    return zip(*columns) if columns else iter(())
+
+def _write_xlsx_xlsxwriter(path, sheets):
+    import xlsxwriter
+    # constant_memory: tiap baris langsung di-flush ke disk, jadi baris wajib ditulis berurutan (tidak lewat DataFrame.to_excel)
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    for sheet_name, df in sheets:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+        for row_number, row in enumerate(_table_rows(df), start=1):
+            worksheet.write_row(row_number, 0, row)
+    workbook.close()
+
+def _write_xlsx_openpyxl_stream(path, sheets):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    workbook = openpyxl.Workbook(write_only=True)
+    thin = Side(style='thin')
+    for sheet_name, df in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        header = []
+        for c in df.columns:
+            cell = WriteOnlyCell(worksheet, value=str(c))
+            cell.font, cell.border, cell.alignment = Font(bold=True), Border(left=thin, right=thin, top=thin, bottom=thin), Alignment(horizontal='center', vertical='top')
+            header.append(cell)
+        worksheet.append(header)
+        for row in _table_rows(df): worksheet.append(row)
+    workbook.save(path)
+
+def _write_xlsx_openpyxl(path, sheets):
+    # Perilaku lama: DataFrame.to_excel lewat engine openpyxl (lambat & boros memori untuk sheet besar)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, df in sheets: df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+EXCEL_WRITERS = {'xlsxwriter': _write_xlsx_xlsxwriter, 'openpyxl-stream': _write_xlsx_openpyxl_stream, 'openpyxl': _write_xlsx_openpyxl}
+try:
+    import xlsxwriter  # noqa: F401  (opsional, backend tercepat)
+    DEFAULT_EXCEL_WRITER = 'xlsxwriter'
+except ImportError:
+    DEFAULT_EXCEL_WRITER = 'openpyxl-stream'
+OUTPUT_FORMATS = ['xlsx', 'csv', 'parquet']
+
+def check_output_format(output_format):
+    """ Pastikan format output bisa ditulis sebelum proses dimulai (parquet butuh pyarrow, dependensi opsional) """
+    if output_format not in OUTPUT_FORMATS: raise ValueError(f"Format output tidak dikenal: '{output_format}'. Pilihan: {', '.join(OUTPUT_FORMATS)}")
+    if output_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Format output 'parquet' butuh paket pyarrow (pip install pyarrow).") from None
+
+def write_tables(path, sheets, output_format='xlsx', excel_writer=DEFAULT_EXCEL_WRITER):
+    """ Tulis daftar (nama_sheet, DataFrame) ke path .xlsx, atau satu file .csv/.parquet per sheet. Kembalikan nama file yang dibuat """
+    if output_format == 'xlsx':
+        EXCEL_WRITERS[excel_writer](path, sheets)
+        return [os.path.basename(path)]
+    stem = os.path.splitext(path)[0]
+    written = []
+    for sheet_name, df in sheets:
+        table_path = f"{stem}.{output_format}" if len(sheets) == 1 else f"{stem} - {sheet_name}.{output_format}"
+        if output_format == 'csv':
+            df.to_csv(table_path, index=False, encoding='utf-8-sig')  # BOM agar Excel membaca UTF-8 dengan benar
+        elif output_format == 'parquet':
+            # Kolom object campuran (angka & teks) dijadikan teks agar bertipe tunggal; sel kosong (None/NaN) tetap null, bukan 'None'/'nan'
+            table = df.copy(deep=False)
+            for c in table.columns[table.dtypes == object]: table[c] = table[c].where(table[c].isna(), table[c].astype(str))
+            table.to_parquet(table_path, index=False)  # butuh pyarrow
+        else:
+            raise ValueError(f"Format output tidak dikenal: '{output_format}'. Pilihan: {', '.join(OUTPUT_FORMATS)}")
+        written.append(os.path.basename(table_path))
+    return written
+
+def remove_tables(path):
+    """ Hapus file hasil write_tables satu sheet di semua format output (mis. file delta lama yang sudah tidak berlaku) """
+    stem = os.path.splitext(path)[0]
+    for table_path in (f"{stem}.{output_format}" for output_format in OUTPUT_FORMATS):
+        if os.path.exists(table_path): os.remove(table_path)
+
+def write_audit_report(filename, summary_df, safe_df, warning_df, not_found_df, multi_listing_df=None, output_format='xlsx', excel_writer=DEFAULT_EXCEL_WRITER):
+    sheets = [('Ringkasan Laporan', summary_df)]
+
+    found_cols = {'promo_sku_cleaned': 'SKU (Sudah Dibersihkan)', 'nama_produk_platform': 'Nama Produk di Platform', 'Harga_Diskon_Final': 'Harga Promo Final'}
+    report_found = safe_df[found_cols.keys()].copy()
+    report_found.columns = found_cols.values()
+    sheets.append(('Produk Ditemukan (Aman)', report_found))
+
+    if not warning_df.empty:
+        warning_cols = {'promo_sku_cleaned': 'SKU', 'nama_produk_platform': 'Nama Produk', 'harga_jual_online': 'Harga Asli', 'Harga_Diskon_Final': 'Harga Promo Final', 'Persentase_Diskon': 'Diskon', 'alasan_peringatan': 'Alasan Peringatan'}
+        report_warning = warning_df[warning_cols.keys()].copy()
+        report_warning.columns = warning_cols.values()
+        report_warning['Diskon'] = (report_warning['Diskon'] * 100).map('{:.2f}%'.format)
+        sheets.append(('Peringatan Harga (Tinjauan)', report_warning))  # nama sheet Excel maksimal 31 karakter
+
+    if not not_found_df.empty:
+        not_found_cols = {'promo_sku_cleaned': 'SKU Tidak Ditemukan (Dibersihkan)', 'sku_asli': 'SKU Asli (Dari File Promo)', 'harga_jual_offline': 'Harga Jual Asli (Offline)'}
+        report_not_found = not_found_df[not_found_cols.keys()].copy()
+        report_not_found.columns = not_found_cols.values()
+        sheets.append(('Produk Tidak Ditemukan', report_not_found))
+
+    if multi_listing_df is not None and not multi_listing_df.empty:
+        multi_cols = {'promo_sku_cleaned': 'SKU', 'id_produk': 'ID Produk', 'id_varian': 'ID Variasi/SKU', 'nama_produk_platform': 'Nama Produk', 'Harga_Diskon_Final': 'Harga Promo Final'}
+        report_multi = multi_listing_df[multi_cols.keys()].copy()
+        report_multi.columns = multi_cols.values()
+        sheets.append(('SKU Multi-Listing', report_multi))
+
+    return write_tables(filename, sheets, output_format, excel_writer)
+
+def write_upload_file(output_df, filename, output_format='xlsx', excel_writer=DEFAULT_EXCEL_WRITER):
+    return write_tables(filename, [('Sheet1', output_df)], output_format, excel_writer)
+
+def run_loader(path, loader, cache=None, kind=None):
+    """ Dijalankan di proses worker: kembalikan (DataFrame, dari_cache, catatan profil) """
+    profiler = RunProfiler()
+    if cache is None: return loader(path, profiler), False, profiler.records
+    start = time.perf_counter()
+    df, from_cache = cache.load(kind, path, functools.partial(loader, profiler=profiler))
+    if from_cache: profiler.record('baca cache', os.path.basename(path), time.perf_counter() - start, rows_out=len(df), df=df)
+    return df, from_cache, profiler.records
+
+def run_scanner(path, scanner, promo_skus, chunk_rows):
+    """ Dijalankan di proses worker: kembalikan (listing yang cocok, jumlah baris dipindai, catatan profil) """
+    profiler = RunProfiler()
+    matched_df, scanned = scanner(path, promo_skus, chunk_rows, profiler=profiler)
+    return matched_df, scanned, profiler.records
+
+def run_writer(writer, rows, *args):
+    """ Dijalankan di proses worker: kembalikan (file yang ditulis, catatan profil). rows = jumlah baris data yang ditulis """
+    profiler = RunProfiler()
+    with profiler.stage('tulis file', rows_in=rows) as stage:
+        written = writer(*args)
+        stage.update(detail=', '.join(written), rows_out=rows)
+    return written, profiler.records
+
+# Aturan audit harga. Setiap aturan = (alasan, fungsi mask boolean per DataFrame); baris yang kena salah satu mask
+# masuk daftar peringatan. Aturan bisa dimatikan & batas per kategori ditambahkan lewat file JSON, contoh:
+#   {"rules": {"online_below_offline": true}, "category_limits": {"ELEKTRONIK": {"min_price": 50000, "max_discount": 0.5}}}
+AUDIT_CONFIG_FILE = 'audit_rules.json'
+# online_below_offline mati secara default: harga online yang memang lebih murah dari offline adalah strategi harga yang sah
+DEFAULT_AUDIT_RULES = {'min_price': True, 'max_discount': True, 'negative_discount': True, 'online_below_offline': False, 'zero_price': True}
+
+def load_audit_config(path):
+    """ Baca & validasi file aturan audit; isi yang salah tipe ditolak dengan ValueError sebelum proses dimulai """
+    with open(path, encoding='utf-8') as f: config = json.load(f)
+    if not isinstance(config, dict): raise ValueError(f"Isi '{path}' harus berupa objek JSON.")
+    unknown = set(config) - {'rules', 'category_limits'}
+    if unknown: raise ValueError(f"Bagian tidak dikenal di '{path}': {', '.join(sorted(unknown))}. Pilihan: rules, category_limits (min_price/max_discount ditulis per kategori)")
+    rules = config.get('rules', {})
+    if not isinstance(rules, dict): raise ValueError(f"'rules' di '{path}' harus berupa objek, contoh: {{\"online_below_offline\": true}}.")
+    unknown = set(rules) - set(DEFAULT_AUDIT_RULES)
+    if unknown: raise ValueError(f"Aturan audit tidak dikenal di '{path}': {', '.join(sorted(unknown))}. Pilihan: {', '.join(DEFAULT_AUDIT_RULES)}")
+    # "false" (string) bernilai truthy dan diam-diam tetap mengaktifkan aturan, jadi hanya true/false yang diterima
+    not_bool = [name for name, enabled in rules.items() if not isinstance(enabled, bool)]
+    if not_bool: raise ValueError(f"Nilai aturan audit di '{path}' harus true/false (tanpa tanda kutip): {', '.join(sorted(not_bool))}")
+    category_limits = config.get('category_limits', {})
+    if not isinstance(category_limits, dict) or not all(isinstance(limits, dict) for limits in category_limits.values()):
+        raise ValueError(f"'category_limits' di '{path}' harus berupa objek per kategori, contoh: {{\"ELEKTRONIK\": {{\"min_price\": 50000}}}}.")
+    for category, limits in category_limits.items():
+        unknown = set(limits) - {'min_price', 'max_discount'}
+        if unknown: raise ValueError(f"Batas tidak dikenal untuk kategori '{category}' di '{path}': {', '.join(sorted(unknown))}. Pilihan: min_price, max_discount")
+        for name, value in limits.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Batas '{name}' untuk kategori '{category}' di '{path}' harus berupa angka, bukan {json.dumps(value)}.")
+    return config
+
+def build_audit_rules(min_price, max_discount, config=None):
+    config = config or {}
+    enabled = {**DEFAULT_AUDIT_RULES, **config.get('rules', {})}
+    rules = []
+    if enabled['min_price']: rules.append((f"Harga di bawah Rp {min_price}", lambda df: df['Harga_Diskon_Final'] < min_price))
+    if enabled['max_discount']: rules.append((f"Diskon di atas {max_discount*100:.0f}%", lambda df: df['Persentase_Diskon'] > max_discount))
+    # Potongan negatif = harga promo offline di atas harga jual offline, sehingga harga final justru naik dari harga online
+    if enabled['negative_discount']: rules.append(("Diskon negatif (harga promo di atas harga online)", lambda df: df['Potongan_Nominal'] < 0))
+    if enabled['online_below_offline']: rules.append(("Harga online di bawah harga offline", lambda df: df['harga_jual_online'] < df['harga_jual_offline']))
+    # clean_price_series mengubah harga kosong/tidak terbaca menjadi 0
+    if enabled['zero_price']: rules.append(("Harga kosong/tidak terbaca", lambda df: (df['harga_jual_offline'] == 0) | (df['harga_promo_offline'] == 0) | (df['harga_jual_online'] == 0)))
+    for category, limits in config.get('category_limits', {}).items():
+        category = str(category).strip().upper()
+        if 'min_price' in limits:
+            rules.append((f"Harga di bawah Rp {limits['min_price']} (kategori {category})", lambda df, c=category, v=limits['min_price']: (df['kategori'] == c) & (df['Harga_Diskon_Final'] < v)))
+        if 'max_discount' in limits:
+            rules.append((f"Diskon di atas {limits['max_discount']*100:.0f}% (kategori {category})", lambda df, c=category, v=limits['max_discount']: (df['kategori'] == c) & (df['Persentase_Diskon'] > v)))
+    return rules
+
+def apply_audit_rules(df, rules):
+    """ Kembalikan (mask peringatan, Series alasan). Alasan disusun per kombinasi aturan unik, bukan per baris """
+    if not rules or df.empty: return pd.Series(False, index=df.index), pd.Series('', index=df.index, dtype=object)
+    masks = np.column_stack([mask_fn(df).to_numpy(dtype=bool) for _, mask_fn in rules])
+    # Tiap baris diringkas jadi satu kode pola (bit per aturan); teks alasan cukup disusun sekali per pola unik
+    if masks.shape[1] <= 62:
+        codes, pattern_codes = pd.factorize(masks.astype(np.int64) @ (np.int64(1) << np.arange(masks.shape[1], dtype=np.int64)))
+        patterns = (pattern_codes[:, None] >> np.arange(masks.shape[1])) & 1
+    else:
+        patterns, codes = np.unique(masks, axis=0, return_inverse=True)
+        codes = codes.ravel()
+    labels = np.array([', '.join(label for (label, _), hit in zip(rules, pattern) if hit) for pattern in patterns], dtype=object)
+    return pd.Series(masks.any(axis=1), index=df.index), pd.Series(labels[codes], index=df.index, dtype=object)
+
+# Daftar marketplace yang diproses. Marketplace baru cukup didaftarkan di sini (loader DB, template & file upload).
+# db_columns memetakan kolom DB marketplace ke kolom indeks SKU (id_produk, id_varian, nama_produk).
+# uploads: satu entri per file upload; columns memetakan kolom hasil audit ke kandidat nama kolom di template,
+# per_product = satu baris per id_produk (varian aman pertama)
+PLATFORMS = {
+    'Shopee': {
+        'db_key': 'db_shopee', 'db_loader': load_shopee_db, 'db_scanner': scan_shopee_db, 'templates': ['template_shopee'],
+        'db_columns': SHOPEE_DB_COLUMNS,
+        'uploads': [
+            {'file': 'HASIL_PROMO_SHOPEE.xlsx', 'template': 'template_shopee', 'label': 'Tmpl Shopee', 'per_product': False,
+             'columns': {'id_produk': ['ID Produk', 'Kode Produk'], 'id_varian': ['ID Variasi', 'Kode Variasi'], 'Harga_Diskon_Final': ['Harga Diskon']}},
+        ],
+    },
+    'TikTok': {
+        'db_key': 'db_tiktok', 'db_loader': load_tiktok_db, 'db_scanner': scan_tiktok_db, 'templates': ['template_tiktok1', 'template_tiktok2'],
+        'db_columns': TIKTOK_DB_COLUMNS,
+        'uploads': [
+            {'file': 'HASIL_PROMO_TIKTOK_METODE1.xlsx', 'template': 'template_tiktok1', 'label': 'Tmpl TikTok M1', 'per_product': False,
+             'columns': {'id_produk': ['Product_id (wajib) diisi', 'Product_id (wajib)'], 'id_varian': ['SKU_id (wajib) diisi', 'SKU_id (wajib)'], 'Harga_Diskon_Final': ['Harga Penawaran (wajib) diisi', 'Harga Penawaran (wajib)']}},
+            {'file': 'HASIL_PROMO_TIKTOK_METODE2.xlsx', 'template': 'template_tiktok2', 'label': 'Tmpl TikTok M2', 'per_product': True,
+             'columns': {'id_produk': ['Product_id (wajib) diisi', 'Product_id (wajib)'], 'Harga_Diskon_Final': ['Harga Penawaran (wajib) diisi', 'Harga Penawaran (wajib)']}},
+        ],
+    },
+}
+
+def upload_rows(spec, safe_df):
+    return safe_df.drop_duplicates(subset=['id_produk'], keep='first') if spec['per_product'] else safe_df
+
+def build_upload_frame(template_df, spec, rows):
+    """ Susun isi file upload dengan urutan kolom template; kolom template yang tidak diisi dibiarkan kosong """
+    cols = {key: find_col_name(template_df, names, spec['label']) for key, names in spec['columns'].items()}
+    output_df = pd.DataFrame({cols[key]: rows[key] for key in cols})
+    output_df[cols['Harga_Diskon_Final']] = pd.to_numeric(output_df[cols['Harga_Diskon_Final']], errors='coerce').round(0).astype('Int64')
+    for col in template_df.columns:
+        if col not in output_df.columns: output_df[col] = ''
+    return output_df[template_df.columns]
+
+def upload_delta_rows(spec, rows, previous_safe_df):
+    """ Baris upload yang belum ada (ID listing + harga sama) di file upload run sebelumnya """
+    key = list(spec['columns'])
+    previous = pd.MultiIndex.from_frame(upload_rows(spec, previous_safe_df)[key].astype(str))
+    return rows[~pd.MultiIndex.from_frame(rows[key].astype(str)).isin(previous)]
+
+def delta_filename(filename):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_DELTA{ext}"
+
+def file_fingerprints(paths):
+    return [(os.path.abspath(p), os.path.getsize(p), os.stat(p).st_mtime_ns) for p in paths]
+
+class SkuIndex:
+    """ Indeks SKU -> listing marketplace (id_produk, id_varian, nama) per platform, disimpan di disk antar run """
+    VERSION = 2
+    KEY = ['sku', 'id_produk', 'id_varian']
+
+    def __init__(self, path=None):
+        self.path = path  # None = indeks hanya di memori
+        self.sources = None
+        self.entries = None
+        if path and os.path.exists(path):
+            try:
+                stored = pd.read_pickle(path)
+                if stored.get('version') == self.VERSION: self.sources, self.entries = stored['sources'], stored['entries']
+            except Exception:
+                pass  # indeks rusak, dibangun ulang dari DB
+
+    def is_current(self, sources):
+        return self.entries is not None and self.sources == sources
+
+    def update(self, db_df, db_cols, sources):
+        """ Perbarui indeks dari DB hasil parsing. Kembalikan (jumlah listing baru, jumlah listing hilang, dibangun_dari_nol) """
+        entries = pd.DataFrame({'sku': db_df['lookup_sku_cleaned'], 'id_produk': db_df[db_cols['id_produk']], 'id_varian': db_df[db_cols['id_varian']], 'nama_produk_platform': db_df[db_cols['nama_produk']]})
+        # SKU kosong tidak bisa dicocokkan; listing identik (mis. dari file export yang tumpang tindih) cukup satu
+        entries = entries[entries['sku'] != ''].drop_duplicates(subset=self.KEY, keep='first').reset_index(drop=True)
+        entries = entries.astype({'id_produk': 'category', 'nama_produk_platform': 'category'})  # berulang per varian
+        if self.entries is None:
+            added, removed, rebuilt = len(entries), 0, True
+        else:
+            diff = self.entries[self.KEY].merge(entries[self.KEY], on=self.KEY, how='outer', indicator=True)['_merge']
+            added, removed, rebuilt = int((diff == 'right_only').sum()), int((diff == 'left_only').sum()), False
+        self.sources, self.entries = sources, entries
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                pd.to_pickle({'version': self.VERSION, 'sources': sources, 'entries': entries}, tmp_path)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # indeks hanya optimasi
+        return added, removed, rebuilt
+
+    def multi_listing_skus(self):
+        counts = self.entries['sku'].value_counts()
+        return set(counts.index[counts > 1])
+
+class PromoResultStore:
+    """ Hasil per SKU dari run terakhir ke folder output yang sama: harga, Harga_Diskon_Final, status audit & listing
+        per platform. Dipakai untuk melaporkan SKU yang berubah dan membuat file upload delta """
+    VERSION = 1
+    SKU_COLUMNS = ['promo_sku_cleaned', 'harga_jual_offline', 'harga_promo_offline', 'harga_jual_online', 'kategori', 'Harga_Diskon_Final']
+    LISTING_COLUMNS = ['platform', 'promo_sku_cleaned', 'id_produk', 'id_varian', 'Harga_Diskon_Final', 'status']
+
+    def __init__(self, path=None):
+        self.path = path  # None = tidak disimpan
+        self.skus = None
+        self.listings = None
+        if path and os.path.exists(path):
+            try:
+                stored = pd.read_pickle(path)
+                if stored.get('version') == self.VERSION: self.skus, self.listings = stored['skus'], stored['listings']
+            except Exception:
+                pass  # store rusak, diperlakukan seperti run pertama
+
+    @staticmethod
+    def path_for(store_dir, output_dir):
+        return os.path.join(store_dir, f"hasil_run_{hashlib.sha1(os.path.abspath(output_dir).encode('utf-8')).hexdigest()[:12]}.store")
+
+    @property
+    def has_previous(self):
+        return self.skus is not None
+
+    def diff_skus(self, final_df):
+        """ Bandingkan SKU hasil kalkulasi dengan run sebelumnya. Kembalikan jumlah SKU baru, berubah, tetap & dihapus """
+        # Inner merge agar kolom harga tetap int (outer merge mengubahnya ke float karena NaN di SKU baru/hilang)
+        both = self.skus.merge(final_df[self.SKU_COLUMNS], on='promo_sku_cleaned', suffixes=('_lama', ''))
+        changed = pd.Series(False, index=both.index)
+        for col in self.SKU_COLUMNS[1:]: changed |= both[col].astype(str) != both[f"{col}_lama"].astype(str)
+        new = int((~final_df['promo_sku_cleaned'].isin(self.skus['promo_sku_cleaned'])).sum())
+        removed = int((~self.skus['promo_sku_cleaned'].isin(final_df['promo_sku_cleaned'])).sum())
+        return {'new': new, 'changed': int(changed.sum()), 'unchanged': int((~changed).sum()), 'removed': removed}
+
+    def previous_listings(self, platform, status=None):
+        listings = self.listings[self.listings['platform'] == platform]
+        return listings if status is None else listings[listings['status'] == status]
+
+    def save(self, final_df, listings):
+        skus = final_df[self.SKU_COLUMNS].reset_index(drop=True)
+        listings = pd.concat(listings, ignore_index=True) if listings else pd.DataFrame(columns=self.LISTING_COLUMNS)
+        self.skus, self.listings = skus, listings
+        if not self.path: return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            pd.to_pickle({'version': self.VERSION, 'skus': skus, 'listings': listings}, tmp_path)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # store hanya untuk run berikutnya, kegagalan tulis tidak boleh menggagalkan proses
+
+class ParsedWorkbookCache:
+    """ Cache di disk untuk DataFrame hasil parsing & normalisasi, dikunci path, mtime, ukuran & hash isi file """
+    VERSION = 2  # Naikkan jika logika parsing/normalisasi berubah agar cache lama tidak terpakai
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, kind, path):
+        stat = os.stat(path)
+        content_hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''): content_hash.update(chunk)
+        raw_key = f"{self.VERSION}|{kind}|{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{content_hash.hexdigest()}"
+        return os.path.join(self.cache_dir, hashlib.sha256(raw_key.encode('utf-8')).hexdigest() + ".pkl")
+
+    def load(self, kind, path, loader):
+        """ Kembalikan (DataFrame, dari_cache). Jika belum ada di cache, panggil loader(path) lalu simpan hasilnya """
+        entry = self._entry_path(kind, path)
+        if os.path.exists(entry):
+            try:
+                df = pd.read_pickle(entry)
+                os.utime(entry, None)  # tandai baru dipakai untuk LRU
+                return df, True
+            except Exception:
+                pass  # entri rusak, parsing ulang
+        df = loader(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_entry = f"{entry}.{os.getpid()}.tmp"
+            df.to_pickle(tmp_entry)
+            os.replace(tmp_entry, entry)
+            self.evict()
+        except OSError:
+            pass  # cache hanya optimasi, kegagalan tulis tidak boleh menggagalkan proses
+        return df, False
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir): return []
+        return [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith('.pkl')]
+
+    def evict(self):
+        total = 0
+        for entry in sorted(self._entries(), key=lambda e: e.stat().st_mtime, reverse=True):
+            total += entry.stat().st_size
+            if total > self.max_bytes: os.remove(entry.path)
+
+    def clear(self):
+        # Ikut menghapus indeks SKU (*.idx) & hasil run terakhir (*.store) yang disimpan di folder yang sama
+        entries = self._entries()
+        if os.path.isdir(self.cache_dir): entries += [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith(('.idx', '.store'))]
+        for entry in entries: os.remove(entry.path)
+        return len(entries)
+
+
+class PromoEngine:
+    """ Mesin proses & audit promo: menerima path file + ambang audit, mengembalikan DataFrame & ringkasan. Tidak bergantung pada Tkinter """
+
+    def __init__(self, min_price_threshold=1000, max_discount_percentage=0.90, max_workers=DEFAULT_MAX_WORKERS, cache=None, log=print, output_format='xlsx', excel_writer=DEFAULT_EXCEL_WRITER, audit_config=None, streaming=False, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+        self.MIN_PRICE_THRESHOLD = min_price_threshold
+        self.MAX_DISCOUNT_PERCENTAGE = max_discount_percentage
+        self.audit_rules = build_audit_rules(min_price_threshold, max_discount_percentage, audit_config)
+        self.max_workers = max_workers
+        self.cache = cache
+        self.index_dir = cache.cache_dir if cache is not None else None
+        check_output_format(output_format)
+        self.output_format = output_format
+        self.excel_writer = excel_writer
+        self.streaming = streaming  # DB marketplace dipindai per potongan baris; memori dibatasi ukuran list promo, bukan katalog
+        self.chunk_rows = chunk_rows
+        self.log = log
+        self.progress = progress  # callable(selesai, total, keterangan), dipanggil dari thread worker mana pun
+        self._progress = [0, 1]
+        self._progress_lock = threading.Lock()
+        self.output_dir = '.'
+        self.profiler = RunProfiler()
+        self.result_store = None  # hasil run terakhir ke folder output yang sama (hanya jika cache aktif)
+
+    def output_path(self, filename):
+        return os.path.join(self.output_dir, filename)
+
+    def advance(self, label, units=1):
+        """ Tambah kemajuan proses lalu laporkan ke callback progress (di dalam lock agar urutan laporan tidak terbalik) """
+        if self.progress is None: return
+        with self._progress_lock:
+            self._progress[0] = min(self._progress[0] + units, self._progress[1])
+            self.progress(self._progress[0], self._progress[1], label)
+
+    def submit_load(self, pool, path, loader, kind=None):
+        # kind diisi = hasil dimasukkan ke cache workbook; progres dilaporkan per file begitu selesai dibaca
+        future = pool.submit(run_loader, path, loader, self.cache if kind else None, kind)
+        def report_progress(done):
+            if done.cancelled() or done.exception() is not None: return  # error dilaporkan saat hasilnya diambil
+            df, from_cache, records = done.result()
+            self.profiler.extend(records)
+            self.log(f"   - {os.path.basename(path)}: {len(df)} baris{' (dari cache)' if from_cache else ''}.")
+            self.advance(f"{os.path.basename(path)} selesai dibaca")
+        future.add_done_callback(report_progress)
+        return future
+
+    def submit_scan(self, pool, path, scanner, promo_skus):
+        future = pool.submit(run_scanner, path, scanner, promo_skus, self.chunk_rows)
+        def report_progress(done):
+            if done.cancelled() or done.exception() is not None: return  # error dilaporkan saat hasilnya diambil
+            matched_df, scanned, records = done.result()
+            self.profiler.extend(records)
+            self.log(f"   - {os.path.basename(path)}: {scanned} baris dipindai, {len(matched_df)} listing cocok.")
+            self.advance(f"{os.path.basename(path)} selesai dipindai")
+        future.add_done_callback(report_progress)
+        return future
+
+    def submit_write(self, pool, writer, rows, *args):
+        # Hasil future = (file yang ditulis, catatan profil); catatan langsung digabung ke profil run
+        future = pool.submit(run_writer, writer, rows, *args)
+        future.add_done_callback(lambda done: None if done.cancelled() or done.exception() is not None else self.profiler.extend(done.result()[1]))
+        return future
+
+    def run(self, inputs, output_dir='.'):
+        """ Jalankan seluruh proses. inputs berisi semua INPUT_KEYS. Error fatal dilog lalu dilempar ulang """
+        missing = [key for key in INPUT_KEYS if not inputs.get(key)]
+        if missing: raise ValueError(f"Input belum lengkap: {', '.join(missing)}")
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.profiler = profiler = RunProfiler()
+        self.result_store = store = PromoResultStore(PromoResultStore.path_for(self.index_dir, output_dir)) if self.index_dir else None
+        run_start = time.perf_counter()
+        # Satuan kemajuan: tiap file input dibaca/dipindai, kalkulasi harga, audit & penulisan file per platform, laporan ringkasan
+        input_files = 5 + sum(len(inputs[platform['db_key']]) for platform in PLATFORMS.values())
+        self._progress = [0, input_files + 1 + 2 * len(PLATFORMS) + 1]
+        self.advance("Membaca file input...", 0)
+        result = {'has_errors': False, 'total_promo_input': 0, 'promo_duplicates_removed': 0, 'matched': 0, 'platforms': {}, 'final_df': None, 'summary_df': None, 'output_files': [], 'profile': [], 'incremental': None}
+        pool = None
+        try:
+            self.log(f"\n[0] Membaca semua file input secara paralel ({self.max_workers} proses)...")
+            pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            promo_job = self.submit_load(pool, inputs["promo_internal"], load_promo_data)
+            master_job = self.submit_load(pool, inputs["db_master"], load_master_data, "db_master")
+            platform_jobs = {}
+            for platform_name, platform in PLATFORMS.items():
+                if self.streaming:
+                    # DB baru dipindai setelah SKU promo diketahui (lihat langkah [3]); indeks hanya berisi listing yang cocok
+                    platform_jobs[platform_name] = {'db': None, 'index': SkuIndex(), 'sources': None}
+                    for template_key in platform['templates']:
+                        platform_jobs[platform_name][template_key] = self.submit_load(pool, inputs[template_key], load_template)
+                    continue
+                # DB marketplace tidak perlu dibaca sama sekali jika indeks SKU tersimpan dibuat dari file yang sama persis
+                sources = file_fingerprints(inputs[platform['db_key']])
+                index = SkuIndex(os.path.join(self.index_dir, f"sku_index_{platform_name.lower()}.idx") if self.index_dir else None)
+                if index.is_current(sources):
+                    self.log(f"   - DB {platform_name}: tidak berubah, memakai indeks SKU tersimpan ({len(index.entries)} listing).")
+                    self.advance(f"DB {platform_name}: memakai indeks SKU tersimpan", len(sources))
+                    db_jobs = None
+                else:
+                    db_jobs = [self.submit_load(pool, f, platform['db_loader'], platform['db_key']) for f in inputs[platform['db_key']]]
+                platform_jobs[platform_name] = {'db': db_jobs, 'index': index, 'sources': sources}
+                for template_key in platform['templates']:
+                    platform_jobs[platform_name][template_key] = self.submit_load(pool, inputs[template_key], load_template)
+
+            self.log("\n[1] Membaca & Mempersiapkan Data Promo (Offline)...")
+            promo_data = promo_job.result()[0]
+            total_promo_input = len(promo_data)
+
+            self.log("[2] Membaca & Mempersiapkan Data Master (Online)...")
+            master_data = master_job.result()[0]
+            
+            self.log("\n[3] Validasi data, pembersihan harga, & kalkulasi harga final...")
+            
+            self.log("-> Memeriksa dan membersihkan SKU duplikat dari file input...")
+            promo_count_before = len(promo_data)
+            with profiler.stage('hapus SKU duplikat', 'promo', promo_count_before) as stage:
+                promo_data.drop_duplicates(subset=['sku'], keep='first', inplace=True)
+                stage['rows_out'] = len(promo_data)
+            promo_duplicates_removed = promo_count_before - len(promo_data)
+            if promo_duplicates_removed > 0: self.log(f"   - File Promo: Dihapus {promo_duplicates_removed} SKU duplikat.")
+
+            master_count_before = len(master_data)
+            with profiler.stage('hapus SKU duplikat', 'master', master_count_before) as stage:
+                master_data.drop_duplicates(subset=['sku'], keep='first', inplace=True)
+                stage['rows_out'] = len(master_data)
+            if master_count_before > len(master_data): self.log(f"   - File DB Master: Dihapus {master_count_before - len(master_data)} SKU duplikat.")
+
+            with profiler.stage('merge', 'promo x master', len(promo_data)) as stage:
+                final_df = pd.merge(promo_data, master_data, on='sku', how='inner')
+                stage.update(rows_out=len(final_df), df=final_df)
+            del promo_data, master_data, promo_job, master_job  # future ikut menyimpan hasilnya; dilepas agar frame input bisa dibebaskan
+            self.log(f"-> Ditemukan {len(final_df)} produk dengan SKU unik yang cocok antara promo list dan DB master.")
+            result.update(total_promo_input=total_promo_input, promo_duplicates_removed=promo_duplicates_removed, matched=len(final_df), final_df=final_df)
+
+            if not final_df.empty:
+                with profiler.stage('kalkulasi harga', '', len(final_df)) as stage:
+                    final_df['Potongan_Nominal'] = final_df['harga_jual_offline'] - final_df['harga_promo_offline']
+                    final_df['Harga_Diskon_Final'] = final_df['harga_jual_online'] - final_df['Potongan_Nominal']
+                    final_df['Persentase_Diskon'] = (final_df['Potongan_Nominal'] / final_df['harga_jual_online']).fillna(0)
+                    stage.update(rows_out=len(final_df), df=final_df)
+                final_df.rename(columns={'sku': 'promo_sku_cleaned'}, inplace=True)
+
+                if store is not None and store.has_previous:
+                    with profiler.stage('bandingkan run sebelumnya', '', len(final_df)) as stage:
+                        changes = store.diff_skus(final_df)
+                        stage['rows_out'] = changes['new'] + changes['changed']
+                    result['incremental'] = changes
+                    self.log(f"-> Dibanding run sebelumnya: {changes['new']} SKU baru, {changes['changed']} SKU berubah (harga/kategori), {changes['unchanged']} SKU tetap, {changes['removed']} SKU dihapus dari promo.")
+                elif store is not None:
+                    self.log("-> Belum ada hasil run sebelumnya untuk folder output ini; file upload delta dibuat mulai run berikutnya.")
+
+                self.log("-> Contoh hasil kalkulasi:")
+                self.log(final_df[['promo_sku_cleaned', 'harga_jual_online', 'Harga_Diskon_Final']].head().to_string())
+                self.advance("Kalkulasi harga selesai")
+
+                if self.streaming:
+                    self.log(f"\n-> Mode streaming: memindai DB marketplace per {self.chunk_rows} baris, hanya listing dengan SKU promo yang disimpan...")
+                    promo_skus = frozenset(final_df['promo_sku_cleaned']) - {''}
+                    for name, platform in PLATFORMS.items():
+                        platform_jobs[name]['scan'] = [self.submit_scan(pool, f, platform['db_scanner'], promo_skus) for f in inputs[platform['db_key']]]
+
+                # Tiap marketplace diproses di thread sendiri; status error & ringkasan dikembalikan per platform, bukan ditulis ke state bersama.
+                # final_df dipakai bersama tanpa salinan: process_platform hanya membacanya (merge selalu membuat frame baru)
+                with ThreadPoolExecutor(max_workers=len(PLATFORMS)) as platform_pool:
+                    platform_futures = {name: platform_pool.submit(self.process_platform, name, final_df, platform_jobs[name], pool) for name in PLATFORMS}
+                platform_results = {name: future.result() for name, future in platform_futures.items()}
+                result['platforms'] = platform_results
+                result['has_errors'] = any(platform_result['has_errors'] for platform_result in platform_results.values())
+                for platform_result in platform_results.values(): result['output_files'] += platform_result['output_files']
+
+                summary_data = {'Metrik': ['Total SKU di File Promo Awal', 'SKU Duplikat Dihapus'], 'Jumlah': [total_promo_input, promo_duplicates_removed]}
+                for name, platform_result in platform_results.items():
+                    summary_data['Metrik'] += ['', f'--- HASIL AUDIT {name.upper()} ---', 'Produk Berhasil Diproses (Aman)', 'Produk Tidak Ditemukan di DB', 'Produk Perlu Tinjauan (Peringatan Harga)']
+                    summary_data['Jumlah'] += ['', '', platform_result['summary'].get('safe', 0), platform_result['summary'].get('not_found', 0), platform_result['summary'].get('warning', 0)]
+                if result['incremental']:
+                    summary_data['Metrik'] += ['', '--- PERUBAHAN DARI RUN SEBELUMNYA ---', 'SKU Baru', 'SKU Berubah (Harga/Kategori)', 'SKU Tetap', 'SKU Dihapus dari Promo']
+                    summary_data['Jumlah'] += ['', '', *(result['incremental'][key] for key in ['new', 'changed', 'unchanged', 'removed'])]
+                summary_df = pd.DataFrame(summary_data)
+                result['summary_df'] = summary_df
+                
+                # Sheet profil (hanya untuk workbook xlsx) berisi semua tahap sampai titik ini; penulisan ringkasan & total hanya masuk ke file JSON
+                summary_sheets = [('Ringkasan Eksekutif', summary_df)] + ([('Profil Proses', profiler.to_frame())] if self.output_format == 'xlsx' else [])
+                with profiler.stage('tulis file', rows_in=len(summary_df)) as stage:
+                    written = write_tables(self.output_path(SUMMARY_FILENAME), summary_sheets, self.output_format, self.excel_writer)
+                    stage.update(detail=', '.join(written), rows_out=len(summary_df))
+                result['output_files'] += written
+                self.log(f"\n-> ✅ Laporan '{', '.join(written)}' telah dibuat.")
+                self.advance("Laporan ringkasan dibuat")
+
+                if store is not None:
+                    # Run yang gagal tidak disimpan: delta berikutnya tetap dibandingkan dengan run terakhir yang berhasil
+                    if result['has_errors']: self.log("-> Hasil run ini tidak disimpan sebagai pembanding run berikutnya karena ada error.")
+                    else: store.save(final_df, [platform_result['listings'] for platform_result in platform_results.values()])
+
+            else:
+                self.log("\n[PERINGATAN] Tidak ada produk yang cocok ditemukan untuk diproses.")
+
+            profiler.record('TOTAL', 'seluruh proses', time.perf_counter() - run_start)
+            result['profile'] = profiler.records
+            result['profile_file'] = self.report_profile()
+            self.advance("Selesai", self._progress[1])
+
+            if not result['has_errors']:
+                self.log("\n====================\n✅ SEMUA PROSES, VALIDASI & AUDIT SELESAI ✅\n====================")
+            else:
+                self.log("\n====================\n⚠️ PROSES SELESAI DENGAN ERROR ⚠️\n====================")
+            return result
+        except Exception as e:
+            self.log(f"❌ ERROR FATAL: {type(e).__name__}: {e}"); self.log(traceback.format_exc())
+            raise
+        finally:
+            if pool is not None: pool.shutdown(wait=True, cancel_futures=True)
+
+    def report_profile(self):
+        """ Tampilkan tabel profil di log & simpan sebagai JSON di folder output; kembalikan nama file profil """
+        profile_df = self.profiler.to_frame()
+        self.log("\n[PROFIL] Waktu, jumlah baris & memori per tahap:")
+        self.log(profile_df.drop(columns='pid').astype(object).map(lambda value: '-' if pd.isna(value) else value).to_string(index=False))
+        with open(self.output_path(PROFILE_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({'pid_utama': os.getpid(), 'tahap': self.profiler.records}, f, indent=2, ensure_ascii=False)
+        self.log(f"-> Profil proses disimpan ke '{PROFILE_FILENAME}'.")
+        return PROFILE_FILENAME
+
+    def process_platform(self, platform_name, promo_data, jobs, pool):
+        # Dijalankan paralel dengan marketplace lain: semua log diberi prefix platform, error dikembalikan per platform
+        tag = f"[{platform_name.upper()}]"
+        log = lambda message: self.log(f"{tag} {message}")
+        profiler = self.profiler
+        result = {'summary': {}, 'has_errors': False, 'output_files': [], 'safe_df': None, 'warning_df': None, 'not_found_df': None, 'listings': None}
+        log("Memulai proses & audit...")
+        try:
+            index = jobs['index']
+            if jobs['db'] is not None:
+                # Hasil dari worker digabung sesuai urutan file yang dipilih, bukan urutan selesai, agar output tetap sama
+                db_frames = [job.result()[0] for job in jobs['db']]
+                jobs['db'] = None  # lepaskan future (yang ikut menyimpan frame per file) setelah hasilnya diambil
+                with profiler.stage('gabung DB', f"{platform_name} ({len(db_frames)} file)", sum(len(df) for df in db_frames)) as stage:
+                    db_df = pd.concat(db_frames, ignore_index=True)
+                    stage.update(rows_out=len(db_df), df=db_df)
+                del db_frames
+                db_cols = {key: find_col_name(db_df, names, f"DB {platform_name}") for key, names in PLATFORMS[platform_name]['db_columns'].items()}
+                with profiler.stage('indeks SKU', platform_name, len(db_df)) as stage:
+                    added, removed, rebuilt = index.update(db_df, db_cols, jobs['sources'])
+                    stage.update(rows_out=len(index.entries), df=index.entries)
+                del db_df
+                if rebuilt: log(f"-> Indeks SKU dibuat: {len(index.entries)} listing.")
+                else: log(f"-> Indeks SKU diperbarui: +{added} listing baru, -{removed} listing hilang ({len(index.entries)} listing).")
+            elif jobs.get('scan') is not None:
+                # Mode streaming: hasil pindai per file (sudah difilter ke SKU promo) digabung sesuai urutan file yang dipilih
+                scan_results = [job.result() for job in jobs['scan']]
+                jobs['scan'] = None
+                matched_df = pd.concat([matched for matched, _, _ in scan_results], ignore_index=True)
+                index.update(matched_df, {key: key for key in PLATFORMS[platform_name]['db_columns']}, None)
+                log(f"-> Mode streaming: {len(index.entries)} listing cocok dari {sum(scanned for _, scanned, _ in scan_results)} baris DB.")
+                del scan_results, matched_df
+
+            with profiler.stage('merge', f"promo x indeks {platform_name}", len(promo_data)) as stage:
+                merged_df = pd.merge(promo_data, index.entries, left_on='promo_sku_cleaned', right_on='sku', how='left').drop(columns='sku')
+                stage.update(rows_out=len(merged_df), df=merged_df)
+            
+            found_mask = merged_df['id_produk'].notna()
+            found_df = merged_df[found_mask]  # boolean indexing sudah menghasilkan frame baru
+            not_found_df = merged_df[~found_mask]
+            del merged_df
+            log(f"-> Ditemukan: {len(found_df)} produk. Tidak Ditemukan: {len(not_found_df)} produk.")
+
+            # SKU yang terhubung ke lebih dari satu listing tetap diproses (promo berlaku di semua listing), tapi dilaporkan
+            multi_listing_df = found_df[found_df['promo_sku_cleaned'].isin(index.multi_listing_skus())]
+            if not multi_listing_df.empty: log(f"-> ⚠️ {multi_listing_df['promo_sku_cleaned'].nunique()} SKU promo terhubung ke lebih dari satu listing ({len(multi_listing_df)} baris). Lihat sheet 'SKU Multi-Listing'.")
+
+            with profiler.stage('aturan audit', f"{platform_name} ({len(self.audit_rules)} aturan)", len(found_df)) as stage:
+                warning_mask, warning_reasons = apply_audit_rules(found_df, self.audit_rules)
+                stage['rows_out'] = int(warning_mask.sum())
+            warning_df = found_df[warning_mask].copy()
+            safe_df = found_df[~warning_mask]
+            if not warning_df.empty: warning_df['alasan_peringatan'] = warning_reasons[warning_mask]
+            log(f"-> Validasi Cerdas: {len(safe_df)} produk aman, {len(warning_df)} produk perlu tinjauan.")
+            self.advance(f"{platform_name}: audit selesai")
+
+            result['listings'] = pd.concat([frame[['promo_sku_cleaned', 'id_produk', 'id_varian', 'Harga_Diskon_Final']].assign(status=status) for frame, status in [(safe_df, 'aman'), (warning_df, 'peringatan'), (not_found_df, 'tidak ditemukan')]], ignore_index=True).astype({'id_produk': object}).assign(platform=platform_name)[PromoResultStore.LISTING_COLUMNS]
+            store = self.result_store
+            previous_safe = store.previous_listings(platform_name, 'aman') if store is not None and store.has_previous else None
+            if previous_safe is not None:
+                key = ['promo_sku_cleaned', 'id_produk', 'id_varian']
+                lost = ~pd.MultiIndex.from_frame(previous_safe[key].astype(str)).isin(pd.MultiIndex.from_frame(safe_df[key].astype(str)))
+                if lost.any(): log(f"-> ⚠️ {int(lost.sum())} listing yang aman di run sebelumnya tidak lagi aman/ada di promo. File delta tidak membatalkan promo; hapus manual di marketplace bila perlu.")
+
+            summary_data = {'Metrik': ['Produk Berhasil Diproses (Aman)', 'Produk Tidak Ditemukan di DB', 'Produk Perlu Tinjauan (Peringatan Harga)'], 'Jumlah': [len(safe_df), len(not_found_df), len(warning_df)]}
+            # Penulisan file Excel dijalankan di process pool agar benar-benar paralel dengan platform lain
+            audit_filename = f'LAPORAN_AUDIT_{platform_name.upper()}.xlsx'
+            audit_job = self.submit_write(pool, write_audit_report, len(safe_df) + len(warning_df) + len(not_found_df) + len(multi_listing_df), self.output_path(audit_filename), pd.DataFrame(summary_data), safe_df, warning_df, not_found_df, multi_listing_df, self.output_format, self.excel_writer)
+
+            result['summary'] = {'safe': len(safe_df), 'not_found': len(not_found_df), 'warning': len(warning_df), 'multi_listing': int(multi_listing_df['promo_sku_cleaned'].nunique())}
+            result.update(safe_df=safe_df, warning_df=warning_df, not_found_df=not_found_df)
+            upload_jobs = []
+            try:
+                for spec in PLATFORMS[platform_name]['uploads']:
+                    delta_path = self.output_path(delta_filename(spec['file']))
+                    if safe_df.empty:
+                        remove_tables(delta_path); continue
+                    template_df = jobs[spec['template']].result()[0]
+                    rows = upload_rows(spec, safe_df)
+                    output_df = build_upload_frame(template_df, spec, rows)
+                    upload_jobs.append(self.submit_write(pool, write_upload_file, len(output_df), output_df, self.output_path(spec['file']), self.output_format, self.excel_writer))
+                    # File delta hanya berisi baris yang belum ada (ID + harga sama) di file upload run sebelumnya
+                    delta_rows = upload_delta_rows(spec, rows, previous_safe) if previous_safe is not None else None
+                    if delta_rows is not None: result['summary'].setdefault('delta_rows', {})[spec['file']] = len(delta_rows)
+                    if delta_rows is None or delta_rows.empty:
+                        remove_tables(delta_path)  # delta lama dari run sebelumnya tidak berlaku lagi
+                        if delta_rows is not None: log(f"-> Delta {spec['file']}: tidak ada perubahan dari run sebelumnya.")
+                        continue
+                    log(f"-> Delta {spec['file']}: {len(delta_rows)} baris baru/berubah dari run sebelumnya.")
+                    delta_df = build_upload_frame(template_df, spec, delta_rows)
+                    upload_jobs.append(self.submit_write(pool, write_upload_file, len(delta_df), delta_df, delta_path, self.output_format, self.excel_writer))
+            finally:
+                try:
+                    written = audit_job.result()[0]
+                    result['output_files'] += written
+                    log(f"-> ✅ Laporan Audit Lengkap '{', '.join(written)}' telah dibuat.")
+                except Exception as e:
+                    log(f"-> ❌ Gagal membuat Laporan Audit '{audit_filename}'. Error: {e}"); result['has_errors'] = True
+            for job in upload_jobs:
+                written = job.result()[0]
+                result['output_files'] += written
+                log(f"-> ✅ File '{', '.join(written)}' telah dibuat.")
+            self.advance(f"{platform_name}: file selesai ditulis")
+        except Exception as e:
+            log(f"-> ❌ ERROR {platform_name}: {e}"); result['has_errors'] = True
+
+        return result
+
+def summary_to_dict(result, output_dir='.'):
+    """ Ringkasan hasil PromoEngine.run yang bisa di-serialisasi ke JSON (tanpa DataFrame) """
+    return {
+        'has_errors': result['has_errors'],
+        'total_promo_input': result['total_promo_input'],
+        'promo_duplicates_removed': result['promo_duplicates_removed'],
+        'matched': result['matched'],
+        'platforms': {name: {**platform_result['summary'], 'has_errors': platform_result['has_errors'], 'output_files': platform_result['output_files']} for name, platform_result in result['platforms'].items()},
+        'output_files': [os.path.join(output_dir, f) for f in result['output_files']],
+        'incremental': result.get('incremental'),
+        'profile_file': os.path.join(output_dir, result['profile_file']) if result.get('profile_file') else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m promo_engine", description="Setting promo massal marketplace tanpa GUI.")
+    parser.add_argument("--promo", required=True, help="File list promo (offline)")
+    parser.add_argument("--db-master", required=True, help="File database master (online)")
+    parser.add_argument("--db-shopee", required=True, nargs='+', help="Satu atau lebih file database produk Shopee")
+    parser.add_argument("--db-tiktok", required=True, nargs='+', help="Satu atau lebih file database produk TikTok")
+    parser.add_argument("--template-shopee", required=True, help="File template promo Shopee")
+    parser.add_argument("--template-tiktok1", required=True, help="File template promo TikTok (metode 1)")
+    parser.add_argument("--template-tiktok2", required=True, help="File template promo TikTok (metode 2)")
+    parser.add_argument("--output-dir", default='.', help="Folder untuk laporan & file upload (default: folder saat ini)")
+    parser.add_argument("--min-price", type=int, default=1000, help="Harga promo minimum sebelum diberi peringatan (default: 1000)")
+    parser.add_argument("--max-discount", type=float, default=0.90, help="Persentase diskon maksimum, 0-1 (default: 0.90)")
+    parser.add_argument("--audit-config", metavar="PATH", help=f"File JSON aturan audit (aktif/nonaktif aturan, batas per kategori). Default: '{AUDIT_CONFIG_FILE}' jika ada")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Jumlah proses paralel (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default='xlsx', help="Format file laporan & upload (default: xlsx). parquet butuh pyarrow")
+    parser.add_argument("--excel-writer", choices=list(EXCEL_WRITERS), default=DEFAULT_EXCEL_WRITER, help=f"Backend penulis xlsx (default: {DEFAULT_EXCEL_WRITER}); 'openpyxl' = perilaku lama")
+    parser.add_argument("--stream", action='store_true', help="Mode streaming untuk katalog sangat besar: DB marketplace dipindai per potongan baris, hanya listing dengan SKU promo yang disimpan (tanpa cache & indeks SKU)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help=f"Jumlah baris per potongan pada mode streaming (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Folder cache workbook hasil parsing")
+    parser.add_argument("--no-cache", action='store_true', help="Jangan memakai cache workbook")
+    parser.add_argument("--json-summary", metavar="PATH", help="Tulis ringkasan hasil dalam format JSON ke PATH ('-' untuk stdout)")
+    args = parser.parse_args(argv)
+    try:
+        check_output_format(args.output_format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    inputs = {
+        "promo_internal": args.promo, "db_master": args.db_master, "db_shopee": args.db_shopee, "db_tiktok": args.db_tiktok,
+        "template_shopee": args.template_shopee, "template_tiktok1": args.template_tiktok1, "template_tiktok2": args.template_tiktok2,
+    }
+    # Saat ringkasan JSON ditulis ke stdout, log dialihkan ke stderr agar output tetap bisa di-parse
+    log_stream = sys.stderr if args.json_summary == '-' else sys.stdout
+    audit_config_path = args.audit_config or (AUDIT_CONFIG_FILE if os.path.exists(AUDIT_CONFIG_FILE) else None)
+    try:
+        audit_config = load_audit_config(audit_config_path) if audit_config_path else None
+    except (OSError, ValueError) as e:
+        print(f"❌ Gagal membaca konfigurasi audit: {e}", file=sys.stderr); return 2
+    engine = None
+    try:
+        # Satu write per pesan agar log dari beberapa thread tidak saling terpotong
+        engine = PromoEngine(args.min_price, args.max_discount, max(1, args.workers), None if args.no_cache else ParsedWorkbookCache(args.cache_dir), log=lambda message: (log_stream.write(message + "\n"), log_stream.flush()), output_format=args.output_format, excel_writer=args.excel_writer, audit_config=audit_config, streaming=args.stream, chunk_rows=max(1, args.chunk_rows))
+        result = engine.run(inputs, args.output_dir)
+    except Exception as e:
+        if engine is None: print(f"❌ ERROR FATAL: {type(e).__name__}: {e}", file=sys.stderr)  # error dari run() sudah dilog engine
+        return 2
+
+    if args.json_summary:
+        summary_json = json.dumps(summary_to_dict(result, args.output_dir), indent=2, ensure_ascii=False)
+        if args.json_summary == '-':
+            print(summary_json)
+        else:
+            with open(args.json_summary, 'w', encoding='utf-8') as f: f.write(summary_json + "\n")
+    return 1 if result['has_errors'] else 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,36 @@
+""" clean_sku_series (satu list comprehension per kolom) harus sama dengan clean_value lama yang dipanggil per baris """
+import numpy as np
+import pandas as pd
+import pytest
+
+from promo_engine import clean_sku_series
+
+def clean_value(value):
+    # Salinan fungsi lama di massal_promo.py yang dulu dipakai lewat Series.apply
+    if pd.isna(value): return ""
+    return str(value).strip().upper().replace("O", "0").split('.')[0]
+
+VALUES = [
+    np.nan, None, pd.NA, pd.NaT, '', '   ',
+    12345.0, '12345.0', 12345, 1e20, -0.5,
+    '\xa0SK-001\xa0', ' sk-001 ', 'SK\xa0001',
+    'a.b.c', '.awal', 'akhir.',
+    'sko001', 'SKO-OO1', 'straße', 'SK/001#2',
+]
+
+@pytest.mark.parametrize('value', VALUES, ids=[repr(v) for v in VALUES])
+def test_same_as_clean_value(value):
+    assert clean_sku_series(pd.Series([value], dtype=object)).tolist() == [clean_value(value)]
+
+def test_random_skus_same_as_apply():
+    rng = np.random.default_rng(7)
+    alphabet = list('abcoxyzABCOXYZ0123456789 .-/') + ['\xa0']
+    values = pd.Series([''.join(rng.choice(alphabet, rng.integers(0, 12))) for _ in range(5000)], dtype=object)
+    values[rng.random(len(values)) < 0.05] = np.nan
+    pd.testing.assert_series_equal(clean_sku_series(values), values.apply(clean_value))
+
+def test_keeps_index_and_object_dtype():
+    series = pd.Series(['sko1.0', np.nan], index=[10, 3])
+    result = clean_sku_series(series)
+    assert result.index.tolist() == [10, 3] and result.dtype == object
+    assert result.tolist() == ['SK01', '']
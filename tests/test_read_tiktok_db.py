@@ -0,0 +1,89 @@
+""" read_tiktok_db (satu kali buka workbook) harus menghasilkan db_df yang sama dengan jalur lama tiga kali read_excel """
+import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from promo_engine import read_tiktok_db
+
+HEADER = ['product_id', 'sku_id', 'seller_sku', 'product_name', 'price']
+
+def read_tiktok_db_legacy(f):
+    # Salinan jalur lama di massal_promo.py sebelum read_tiktok_db
+    try: pd.read_excel(f, sheet_name="Template", header=None, dtype=str); sheet = "Template"
+    except: sheet = 0
+    peek_df = pd.read_excel(f, sheet_name=sheet, header=None, dtype=str)
+    h_idx = next((i for i, row in peek_df.head(10).iterrows() if 'product_id' in str(row.values).lower() or 'seller_sku' in str(row.values).lower()), 0)
+    return pd.read_excel(f, sheet_name=sheet, header=h_idx, dtype=str).fillna('')
+
+def data_rows(n=5):
+    return [[1729000000000000 + i, 1729500000000000 + i, f"sk{i:05d}.{i}", f"Produk {i}", 10000 + i * 500] for i in range(n)]
+
+def blank_row(ws, row):
+    # Sel kosong yang tetap tersimpan di sheet (ada style), seperti baris kosong pada export asli
+    ws.cell(row=row, column=1).number_format = '0.00'
+
+def offset_header(ws):
+    ws.append(['Petunjuk pengisian template'])
+    ws.append(['Kolom wajib ditandai (wajib)'])
+    ws.append([])
+    ws.append(HEADER)
+    for row in data_rows(): ws.append(row)
+
+def blank_rows_around(ws):
+    blank_row(ws, 1); blank_row(ws, 2)
+    for r, row in enumerate([HEADER] + data_rows(), start=3):
+        for c, value in enumerate(row, start=1): ws.cell(row=r, column=c, value=value)
+    blank_row(ws, 10); blank_row(ws, 11); blank_row(ws, 12)
+
+def no_template_sheet(ws):
+    ws.title = 'Sheet1'
+    ws.append(HEADER)
+    for row in data_rows(): ws.append(row)
+
+def header_not_found(ws):
+    ws.append(['id', 'sku', 'nama'])
+    for i in range(12): ws.append([i, f"SKU{i}", f"Produk {i}"])
+
+def na_and_error_cells(ws):
+    ws.append(HEADER)
+    ws.append([1, 2, 'N/A', 'NULL', 'nan'])
+    ws.append([3, 4, '#N/A', '', None])
+    ws.append([5, 6, 'SK7', '-', 'NA'])
+    ws['E4'] = '#DIV/0!'  # sel error Excel
+
+def dates_and_numbers(ws):
+    ws.append(HEADER + ['dibuat'])
+    ws.append([1, 2, 12345.0, 'Produk', 1.5, datetime.datetime(2024, 1, 31, 13, 45)])
+    ws.append([3, 4, 0.1, 'Produk', -7, datetime.date(2024, 2, 29)])
+    ws.append([5, 6, True, 'Produk', 1e20, datetime.time(8, 30)])
+
+def duplicate_columns(ws):
+    ws.append(['keterangan'])
+    ws.append(HEADER + ['product_name', 'price'])
+    for row in data_rows(): ws.append(row + [f"Duplikat {row[3]}", 1])
+
+CASES = [offset_header, blank_rows_around, no_template_sheet, header_not_found, na_and_error_cells, dates_and_numbers, duplicate_columns]
+
+def write_workbook(path, build, sheet_title='Template'):
+    wb = openpyxl.Workbook()
+    info = wb.active
+    info.title = 'Petunjuk'
+    info.append(['Sheet ini bukan data'])
+    ws = wb.create_sheet(sheet_title)
+    build(ws)
+    if ws.title != sheet_title: wb.remove(info)  # tanpa sheet 'Template': data harus jadi sheet pertama
+    wb.save(path)
+    return path
+
+@pytest.mark.parametrize('build', CASES, ids=[case.__name__ for case in CASES])
+def test_same_db_df_as_legacy_path(tmp_path, build):
+    path = write_workbook(tmp_path / f"{build.__name__}.xlsx", build)
+    pd.testing.assert_frame_equal(read_tiktok_db(path), read_tiktok_db_legacy(path))
+
+def test_usecols_matches_legacy_columns(tmp_path):
+    path = write_workbook(tmp_path / 'offset.xlsx', offset_header)
+    wanted = ['seller_sku', 'product_id']
+    expected = read_tiktok_db_legacy(path)[[c for c in HEADER if c in wanted]]
+    pd.testing.assert_frame_equal(read_tiktok_db(path, usecols=lambda column: column in wanted), expected)